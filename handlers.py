@@ -1,5 +1,8 @@
+import hashlib
+import hmac
 import json
 import logging
+import os
 import time
 import tornado.web
 import tornado.websocket
@@ -9,6 +12,86 @@ import tornado.websocket
 connections = {}
 
 
+class TrafficRecorder:
+    """Records a compact trace of canvas traffic for later replay.
+
+    The trace is a JSON-lines file: a header line with the canvas size and
+    wall-clock start time, followed by one line per event with a timestamp
+    relative to the start of the recording. Client ids are replaced with a
+    keyed hash so traces can be shared without exposing real users.
+    """
+
+    TRACE_VERSION = 1
+
+    def __init__(self, path, width, height):
+        """Open the trace file and write the header."""
+        self.path = path
+        self.started = time.monotonic()
+        self.event_count = 0
+        self.enabled = True
+        # Per-recording secret: the same client maps to the same id within
+        # one trace, but ids cannot be reversed or linked across traces.
+        self._salt = os.urandom(16)
+        self._file = open(path, "w", encoding="utf-8")
+        self._write({
+            "version": self.TRACE_VERSION,
+            "started": time.time(),
+            "width": width,
+            "height": height,
+        })
+        logging.info(f"Recording traffic trace to {path}")
+
+    def anonymize(self, client_id):
+        """Return a stable anonymous id for a client id."""
+        if client_id is None:
+            return None
+        digest = hmac.new(self._salt, str(client_id).encode("utf-8"), hashlib.sha256)
+        return digest.hexdigest()[:12]
+
+    def elapsed(self):
+        """Return seconds since the recording started."""
+        return round(time.monotonic() - self.started, 4)
+
+    def record(self, event, client_id=None, at=None, **fields):
+        """Append an event to the trace, timestamped now unless `at` is given."""
+        if not self.enabled:
+            return
+
+        entry = {"t": self.elapsed() if at is None else at, "e": event}
+        if client_id is not None:
+            entry["c"] = self.anonymize(client_id)
+        entry.update(fields)
+        try:
+            self._write(entry)
+        except (OSError, ValueError) as e:
+            self._disable(e)
+            return
+        self.event_count += 1
+
+    def flush(self):
+        """Flush buffered events to disk."""
+        if not self.enabled or self._file.closed:
+            return
+        try:
+            self._file.flush()
+        except OSError as e:
+            self._disable(e)
+
+    def close(self):
+        """Flush and close the trace file."""
+        if not self._file.closed:
+            self._file.close()
+            logging.info(f"Traffic trace closed: {self.event_count} events written to {self.path}")
+
+    def _disable(self, error):
+        # Recording is diagnostics only; never let it fail a real request
+        self.enabled = False
+        logging.error(f"Traffic trace disabled after write error: {str(error)}")
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
 class MainHandler(tornado.web.RequestHandler):
     """Handler for the main page."""
 
@@ -22,6 +105,10 @@ class PixelAPIHandler(tornado.web.RequestHandler):
 
     async def get(self):
         """Get the current state of the canvas."""
+        recorder = self.application.traffic_recorder
+        if recorder:
+            recorder.record("snapshot")
+
         grid = await self.application.pixel_manager.get_full_grid()
         self.set_header("Content-Type", "application/json")
         self.write(json.dumps({"grid": grid}))
@@ -40,6 +127,13 @@ class PixelAPIHandler(tornado.web.RequestHandler):
                 self.write({"error": "Missing required fields"})
                 return
 
+            # Recorded in on_finish, once the outcome is known
+            if self.application.traffic_recorder:
+                self.trace_placement = {
+                    "at": self.application.traffic_recorder.elapsed(),
+                    "client_id": client_id, "x": x, "y": y, "color": color,
+                }
+
             # Check if user can place a pixel (1 second cooldown)
             can_place, time_left = await self.application.pixel_manager.can_place_pixel(client_id)
 
@@ -76,6 +170,13 @@ class PixelAPIHandler(tornado.web.RequestHandler):
             self.write({"error": "Internal server error"})
 
 
+    def on_finish(self):
+        """Record a placement attempt and its status in the traffic trace."""
+        placement = getattr(self, "trace_placement", None)
+        if placement:
+            self.application.traffic_recorder.record("place", s=self.get_status(), **placement)
+
+
 class PixelSocketHandler(tornado.websocket.WebSocketHandler):
     """WebSocket handler for real-time updates."""
 
@@ -105,6 +206,10 @@ class PixelSocketHandler(tornado.websocket.WebSocketHandler):
                     "data": {"client_id": self.client_id}
                 }))
 
+                recorder = self.application.traffic_recorder
+                if recorder:
+                    recorder.record("connect", self.client_id)
+
             elif msg_type == "place_pixel":
                 # This is handled by the REST API now, but could be implemented here too
                 pass
@@ -118,4 +223,8 @@ class PixelSocketHandler(tornado.websocket.WebSocketHandler):
         """Handle WebSocket connection close."""
         if self.client_id and self.client_id in connections:
             del connections[self.client_id]
-            logging.info(f"WebSocket closed for client: {self.client_id}")
\ No newline at end of file
+            logging.info(f"WebSocket closed for client: {self.client_id}")
+
+            recorder = self.application.traffic_recorder
+            if recorder:
+                recorder.record("disconnect", self.client_id)
\ No newline at end of file
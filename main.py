@@ -2,10 +2,10 @@ import os
 import logging
 import tornado.web
 from tornado.web import Application
-from tornado.ioloop import IOLoop
+from tornado.ioloop import IOLoop, PeriodicCallback
 from tornado.options import define, options, parse_command_line
 
-from handlers import MainHandler, PixelSocketHandler, PixelAPIHandler
+from handlers import MainHandler, PixelSocketHandler, PixelAPIHandler, TrafficRecorder
 from redis_client import RedisClient
 from pixel_manager import PixelManager
 
@@ -16,6 +16,7 @@ define("redis_host", default="localhost", help="Redis host")
 define("redis_port", default=6379, help="Redis port", type=int)
 define("canvas_width", default=1000, help="Canvas width in pixels", type=int)
 define("canvas_height", default=1000, help="Canvas height in pixels", type=int)
+define("trace_file", default=None, help="Record a traffic trace to this file (see replay.py)")
 
 
 def make_app():
@@ -39,6 +40,15 @@ def make_app():
         options.canvas_height
     )
 
+    # Initialize optional traffic recorder
+    traffic_recorder = None
+    if options.trace_file:
+        traffic_recorder = TrafficRecorder(
+            options.trace_file,
+            options.canvas_width,
+            options.canvas_height
+        )
+
     # Setup static path - look for static folder in same directory as main.py
     static_path = os.path.join(os.path.dirname(__file__), "static")
 
@@ -63,6 +73,7 @@ def make_app():
     # Add services to application
     app.pixel_manager = pixel_manager
     app.redis_client = redis_client
+    app.traffic_recorder = traffic_recorder
 
     return app
 
@@ -75,5 +86,13 @@ if __name__ == "__main__":
     app.listen(options.port)
     logging.info(f"Server started on port {options.port}")
 
+    # Flush the traffic trace once a second so little is lost on shutdown
+    if app.traffic_recorder:
+        PeriodicCallback(app.traffic_recorder.flush, 1000).start()
+
     # Start event loop
-    IOLoop.current().start()
\ No newline at end of file
+    try:
+        IOLoop.current().start()
+    finally:
+        if app.traffic_recorder:
+            app.traffic_recorder.close()
\ No newline at end of file
@@ -5,11 +5,12 @@ import logging
 class PixelManager:
     """Manager for the pixel grid and user interactions."""
 
-    def __init__(self, redis_client, width=1000, height=1000):
+    def __init__(self, redis_client, width=1000, height=1000, clock=time.time):
         """Initialize the pixel manager."""
         self.redis = redis_client
         self.width = width
         self.height = height
+        self.clock = clock  # Source of current time for cooldown checks
         self.cooldown_seconds = 1.0  # Time between pixel placements
 
     async def place_pixel(self, x, y, color, user_id):
@@ -47,7 +48,7 @@ class PixelManager:
             # No recent placements, user can place a pixel
             return True, 0
 
-        current_time = time.time()
+        current_time = self.clock()
         time_elapsed = current_time - float(last_placement)
         time_left = max(0, self.cooldown_seconds - time_elapsed)
 
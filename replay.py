@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Replay a traffic trace recorded with `python main.py --trace_file=...`.
+
+The trace can be replayed against a running server over HTTP/WebSocket, or
+directly against a PixelManager backed by in-memory storage, so the cost of
+the pixel logic can be measured without Redis or the network.
+"""
+import sys
+import json
+import math
+import logging
+import time
+import asyncio
+import argparse
+from collections import defaultdict
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+from tornado.websocket import WebSocketClosedError, websocket_connect
+
+from pixel_manager import PixelManager
+
+
+class MemoryStorage:
+    """In-memory stand-in for RedisClient with the same async interface."""
+
+    def __init__(self, clock=time.time):
+        """Initialize empty grid and cooldown tables."""
+        self.pixels = {}
+        self.cooldowns = {}
+        self.clock = clock
+
+    async def get_pixel(self, x, y):
+        """Get the color of a pixel at coordinates (x, y)."""
+        return self.pixels.get(f"{x}:{y}")
+
+    async def set_pixel(self, x, y, color):
+        """Set the color of a pixel at coordinates (x, y)."""
+        self.pixels[f"{x}:{y}"] = color
+        return True
+
+    async def get_all_pixels(self):
+        """Get all pixels from the grid."""
+        return dict(self.pixels)
+
+    async def set_user_cooldown(self, user_id, expiration_time=1):
+        """Set cooldown for a user after placing a pixel."""
+        now = self.clock()
+        self.cooldowns[user_id] = (now, now + expiration_time)
+        return True
+
+    async def get_user_cooldown(self, user_id):
+        """Get cooldown information for a user."""
+        entry = self.cooldowns.get(user_id)
+        if entry is None:
+            return None
+
+        timestamp, expires = entry
+        if self.clock() >= expires:
+            del self.cooldowns[user_id]
+            return None
+
+        return timestamp
+
+
+class DirectTarget:
+    """Replays events against a PixelManager in this process.
+
+    Cooldowns run on a virtual clock set from each event's trace time, so
+    placement outcomes approximate the recording whatever the replay speed.
+    Placements close to the cooldown boundary can still differ, since the
+    trace time is taken on arrival rather than when the server stored the
+    cooldown.
+    """
+
+    def __init__(self, width, height, started):
+        """Create a pixel manager with in-memory storage."""
+        self.started = started
+        self.now = started
+        clock = lambda: self.now
+        self.pixel_manager = PixelManager(MemoryStorage(clock), width, height, clock=clock)
+
+    async def place(self, client_id, x, y, color, at):
+        """Mirror PixelAPIHandler.post: cooldown check, then placement."""
+        # MemoryStorage never suspends, so the clock cannot move under us
+        self.now = self.started + at
+        can_place, _ = await self.pixel_manager.can_place_pixel(client_id)
+        if not can_place:
+            return "rejected"
+
+        success = await self.pixel_manager.place_pixel(x, y, color, client_id)
+        return "ok" if success else "rejected"
+
+    async def snapshot(self):
+        """Fetch the full grid."""
+        await self.pixel_manager.get_full_grid()
+        return "ok"
+
+    async def connect(self, client_id):
+        """WebSocket connections have no cost without a server."""
+        return "skipped"
+
+    async def disconnect(self, client_id):
+        """WebSocket connections have no cost without a server."""
+        return "skipped"
+
+    async def close(self):
+        """Nothing to release."""
+
+
+class ServerTarget:
+    """Replays events against a running Pixel Battle server."""
+
+    def __init__(self, server_url, max_clients):
+        """Set up the HTTP client and WebSocket bookkeeping."""
+        self.server_url = server_url.rstrip('/')
+        self.api_url = f"{self.server_url}/api/pixel"
+        self.ws_url = "ws" + self.server_url[len("http"):] + "/ws"
+        self.http = AsyncHTTPClient(max_clients=max_clients)
+        self.sockets = {}
+
+    async def place(self, client_id, x, y, color, at):
+        """POST a pixel placement; the server applies cooldowns in real time."""
+        body = json.dumps({"x": x, "y": y, "color": color, "client_id": client_id})
+        try:
+            await self.http.fetch(self.api_url, method="POST", body=body)
+            return "ok"
+        except HTTPClientError as e:
+            return "rejected" if e.code in (400, 429) else "error"
+        except OSError:
+            return "error"
+
+    async def snapshot(self):
+        """GET the full grid."""
+        try:
+            await self.http.fetch(self.api_url)
+            return "ok"
+        except (HTTPClientError, OSError):
+            return "error"
+
+    async def connect(self, client_id):
+        """Open a WebSocket and wait for the registration confirmation."""
+        confirmed = asyncio.get_running_loop().create_future()
+
+        def on_message(message):
+            # Pixel broadcasts are discarded; only the confirmation matters
+            if message is None or confirmed.done():
+                return
+            try:
+                msg_type = json.loads(message).get("type")
+            except (ValueError, AttributeError):
+                return
+            if msg_type == "register_confirm":
+                confirmed.set_result(True)
+
+        try:
+            conn = await websocket_connect(self.ws_url, on_message_callback=on_message)
+        except (OSError, HTTPClientError):
+            return "error"
+
+        try:
+            await conn.write_message(json.dumps({"type": "register", "client_id": client_id}))
+            await asyncio.wait_for(confirmed, timeout=10)
+        except (OSError, asyncio.TimeoutError, WebSocketClosedError):
+            conn.close()
+            return "error"
+
+        self.sockets[client_id] = conn
+        return "ok"
+
+    async def disconnect(self, client_id):
+        """Close the client's WebSocket if it is open."""
+        conn = self.sockets.pop(client_id, None)
+        if conn is None:
+            return "skipped"
+        conn.close()
+        return "ok"
+
+    async def close(self):
+        """Close any sockets left open at the end of the trace."""
+        for conn in self.sockets.values():
+            conn.close()
+        self.sockets.clear()
+        self.http.close()
+
+
+def load_trace(trace_path):
+    """
+    Load a trace file.
+
+    Placements are written when their response finishes, so events are
+    sorted back into arrival order.
+
+    Returns:
+        Tuple of (header dict, list of event dicts)
+    """
+    with open(trace_path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != 1:
+            raise ValueError(f"Unsupported trace version: {header.get('version')}")
+        events = [json.loads(line) for line in f if line.strip()]
+
+    events.sort(key=lambda event: event["t"])
+
+    return header, events
+
+
+def recorded_outcome(status):
+    """Map a recorded HTTP status to the outcome names used by the targets."""
+    if status == 200:
+        return "ok"
+    if status in (400, 429):
+        return "rejected"
+    return "error"
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+async def replay(target, events, speed, concurrency):
+    """
+    Replay events against a target.
+
+    Events are dispatched on the trace's schedule scaled by `speed` (0 means
+    as fast as possible), so a slow target builds up a backlog instead of
+    stretching the arrival pattern. At most `concurrency` events run at once.
+    Latency is measured from each event's scheduled time, so time spent
+    queued behind that backlog is included; the queue wait is also kept
+    separately. As fast as possible has no schedule, so latency there is
+    the service time alone.
+
+    Returns:
+        Tuple of (elapsed seconds, {event: [latencies]}, {event: [waits]},
+        {event: {outcome: count}}, {event: count of outcomes that differ
+        from the recording})
+    """
+    latencies = defaultdict(list)
+    waits = defaultdict(list)
+    outcomes = defaultdict(lambda: defaultdict(int))
+    mismatches = defaultdict(int)
+    semaphore = asyncio.Semaphore(concurrency)
+    # Placements from one client stay in order, as they would from one browser
+    client_locks = defaultdict(asyncio.Lock)
+
+    async def run_event(event, scheduled):
+        client_id = event.get("c")
+        if client_id is None:
+            await dispatch(event, scheduled)
+        else:
+            async with client_locks[client_id]:
+                await dispatch(event, scheduled)
+
+    async def dispatch(event, scheduled):
+        kind = event["e"]
+        client_id = event.get("c")
+
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if kind == "place":
+                    outcome = await target.place(client_id, event["x"], event["y"],
+                                                 event["color"], event["t"])
+                elif kind == "snapshot":
+                    outcome = await target.snapshot()
+                elif kind == "connect":
+                    outcome = await target.connect(client_id)
+                elif kind == "disconnect":
+                    outcome = await target.disconnect(client_id)
+                else:
+                    outcome = "unknown"
+            except Exception:
+                # Traces record requests before validation, so replay whatever
+                # the server would have answered with a 500
+                outcome = "error"
+            finished = time.perf_counter()
+
+        if scheduled is None:
+            scheduled = started
+
+        outcomes[kind][outcome] += 1
+        if "s" in event and outcome != recorded_outcome(event["s"]):
+            mismatches[kind] += 1
+        if outcome != "skipped":
+            latencies[kind].append(finished - scheduled)
+            waits[kind].append(max(0.0, started - scheduled))
+
+    tasks = []
+    replay_start = time.perf_counter()
+    for event in events:
+        if speed > 0:
+            scheduled = replay_start + event["t"] / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            scheduled = None
+        tasks.append(asyncio.ensure_future(run_event(event, scheduled)))
+
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - replay_start, latencies, waits, outcomes, mismatches
+
+
+def print_report(elapsed, latencies, waits, outcomes, mismatches, trace_duration):
+    """Print throughput, latency percentiles and queue wait per event type."""
+    total = sum(sum(counts.values()) for counts in outcomes.values())
+    print(f"Replayed {total} events in {elapsed:.2f}s "
+          f"(trace span {trace_duration:.2f}s, {total / elapsed if elapsed else 0:.1f} events/s)")
+    print()
+    print(f"{'event':<12}{'count':>8}{'ops/s':>10}{'p50 ms':>10}{'p90 ms':>10}"
+          f"{'p99 ms':>10}{'max ms':>10}{'wait p99':>10}  outcomes")
+
+    for kind in sorted(outcomes):
+        counts = outcomes[kind]
+        samples = sorted(latencies[kind])
+        count = sum(counts.values())
+        rate = count / elapsed if elapsed else 0
+        p50, p90, p99 = (percentile(samples, p) * 1000 for p in (50, 90, 99))
+        worst = samples[-1] * 1000 if samples else 0.0
+        wait_p99 = percentile(sorted(waits[kind]), 99) * 1000
+        summary = ", ".join(f"{name}={n}" for name, n in sorted(counts.items()))
+        print(f"{kind:<12}{count:>8}{rate:>10.1f}{p50:>10.2f}{p90:>10.2f}"
+              f"{p99:>10.2f}{worst:>10.2f}{wait_p99:>10.2f}  {summary}")
+
+    for kind in sorted(mismatches):
+        print(f"{kind}: {mismatches[kind]} outcomes differ from the recording")
+
+
+def parse_speed(value):
+    """Parse a speed multiplier; 'max' or 0 replays as fast as possible."""
+    if value == "max":
+        return 0.0
+    speed = float(value)
+    if speed < 0:
+        raise argparse.ArgumentTypeError("speed must be positive, 0 or 'max'")
+    return speed
+
+
+async def main(args):
+    header, events = load_trace(args.trace)
+    if not events:
+        print("Trace contains no events. Nothing to replay.")
+        return
+
+    if args.direct:
+        # PixelManager warns on every invalid placement; keep stderr out of the timed loop
+        logging.disable(logging.WARNING)
+        target = DirectTarget(header["width"], header["height"], header["started"])
+        print(f"Replaying {len(events)} events against an in-process PixelManager")
+    else:
+        target = ServerTarget(args.server_url, args.concurrency)
+        print(f"Replaying {len(events)} events against {args.server_url}")
+
+    try:
+        elapsed, latencies, waits, outcomes, mismatches = await replay(
+            target, events, args.speed, args.concurrency)
+    finally:
+        await target.close()
+
+    print_report(elapsed, latencies, waits, outcomes, mismatches, events[-1]["t"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a Pixel Battle traffic trace.")
+    parser.add_argument("trace", help="trace file written with --trace_file")
+    parser.add_argument("server_url", nargs="?", default="http://localhost:8000",
+                        help="server to replay against (default: http://localhost:8000)")
+    parser.add_argument("--direct", action="store_true",
+                        help="drive PixelManager in-process with in-memory storage instead of a server")
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="replay speed multiplier, e.g. 1 or 10; 'max' for as fast as possible (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="maximum in-flight events (default: 10)")
+
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(1)